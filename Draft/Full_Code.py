@@ -1,67 +1,146 @@
 # api_design_doc.py
+#pip install fastapi uvicorn[standard] orjson langchain_groq langgraph python-dotenv cachetools httpx[http2] sentence-transformers
+#uvicorn Full_Code:app --workers 4 --loop uvloop --http httptools --log-level warning
 import os, sys
-from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Query
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from cachetools import TTLCache
 from typing_extensions import TypedDict
 
-from langchain_groq import ChatGroq
+from langchain_core.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, START, END
 
-# Load API Key
-load_dotenv()
-os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
+from semantic_cache import SemanticCache
+from streaming import stream_chain
+# Loads the API key and provides the shared Groq clients, concurrency limit and node helpers
+from workflow import (bounded_ainvoke, http_async_client, http_client, llm, llm_fast,
+                      memoize_node, model_name, speculative_review)
+
+# Cache of generated designs as model_dump() dicts keyed on "design:{model_name}:{idea}"
+response_cache = TTLCache(maxsize=100, ttl=3600)
 
-llm = ChatGroq(model="gemma2-9b-it")
+# Persistent fallback for near-duplicate ideas that miss the exact-match cache
+semantic_cache = SemanticCache.from_env(f"design:{model_name}",
+                                        enabled=os.getenv("SEMANTIC_CACHE_DESIGN", "1") == "1")
 
 class State(TypedDict):
     idea: str
     draft_design: str
+    review: str
     improved_design: str
     final_doc: str
 
+# Prompt templates, built once at import. Static instructions are the system message and the
+# design text is appended last, so calls share a cacheable prompt prefix.
+GENERATE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Generate a REST API design for the idea given by the user. Include endpoints, request/response formats."),
+    ("human", "{idea}"),
+])
+REVIEW_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Check if the API design sent by the user follows REST best practices. Return 'Pass' or 'Fail'."),
+    ("human", "{design}"),
+])
+IMPROVE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Improve the API design sent by the user by adding authentication, error handling, pagination if needed."),
+    ("human", "{design}"),
+])
+MANAGER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Convert the API design sent by the user into a clean OpenAPI-style documentation with clear formatting."),
+    ("human", "{design}"),
+])
+
 # Nodes
-def generate_api_design(state: State):
-    msg = llm.invoke(f"Generate a REST API design for: {state['idea']}. Include endpoints, request/response formats.")
+async def generate_api_design(state: State):
+    msg = await bounded_ainvoke(llm, GENERATE_PROMPT.format_messages(idea=state["idea"]))
     return {"draft_design": msg.content}
 
-def peer_review_design(state: State):
-    msg = llm.invoke(f"Check if this API design follows REST best practices:\n{state['draft_design']}\nReturn 'Pass' or 'Fail'.")
+@memoize_node("draft_design")
+async def peer_review_design(state: State):
+    msg = await bounded_ainvoke(llm_fast, REVIEW_PROMPT.format_messages(design=state["draft_design"]))
     return "Pass" if "pass" in msg.content.lower() else "Fail"
 
-def improve_design(state: State):
-    msg = llm.invoke(f"Improve this API design by adding authentication, error handling, pagination if needed:\n{state['draft_design']}")
+@memoize_node("draft_design")
+async def improve_design(state: State):
+    msg = await bounded_ainvoke(llm, IMPROVE_PROMPT.format_messages(design=state["draft_design"]), "improve_design")
     return {"improved_design": msg.content}
 
-def manager_review(state: State):
-    msg = llm.invoke(f"Convert this API design into a clean OpenAPI-style documentation with clear formatting:\n{state['improved_design']}")
+async def review_and_improve_design(state: State):
+    """Review the draft design while speculatively improving it, cancelling the improvement on Pass."""
+    review, improved = await speculative_review(peer_review_design, improve_design, state)
+    return {"review": review, **(improved or {})}
+
+@memoize_node("improved_design")
+async def manager_review(state: State):
+    msg = await bounded_ainvoke(llm, MANAGER_PROMPT.format_messages(design=state["improved_design"]))
     return {"final_doc": msg.content}
 
 # Workflow
 workflow = StateGraph(State)
 workflow.add_node("generate_api_design", generate_api_design)
-workflow.add_node("improve_design", improve_design)
+workflow.add_node("review_and_improve_design", review_and_improve_design)
 workflow.add_node("manager_review", manager_review)
 
 workflow.add_edge(START, "generate_api_design")
-workflow.add_conditional_edges("generate_api_design", peer_review_design, {"Fail": "improve_design", "Pass": END})
-workflow.add_edge("improve_design", "manager_review")
+workflow.add_edge("generate_api_design", "review_and_improve_design")
+workflow.add_conditional_edges("review_and_improve_design", lambda state: state["review"],
+                               {"Fail": "manager_review", "Pass": END})
 workflow.add_edge("manager_review", END)
 chain = workflow.compile()
 
 # FastAPI App
-app = FastAPI(title="API Design & Documentation Generator")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model before serving so the first request does not wait for it
+    await semantic_cache.warm()
+    yield
+    await http_async_client.aclose()
+    http_client.close()
+    semantic_cache.close()
+
+app = FastAPI(title="API Design & Documentation Generator",
+              default_response_class=ORJSONResponse,
+              lifespan=lifespan)
 
 class APIDesignResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     idea: str
     draft_design: str
     improved_design: str | None = None
     final_doc: str | None = None
 
+# Prebuilt adapter validates the plain dict directly in pydantic-core (Pydantic v2)
+_DESIGN_ADAPTER = TypeAdapter(APIDesignResponse)
+
 @app.post("/design", response_model=APIDesignResponse)
-def design_api(idea: str = Query(..., description="Describe your API idea")):
-    state = chain.invoke({"idea": idea})
-    return APIDesignResponse(**state)
+async def design_api(idea: str = Query(..., description="Describe your API idea")):
+    key = f"design:{model_name}:{idea}"
+    if key in response_cache:
+        return _DESIGN_ADAPTER.validate_python(response_cache[key])
+
+    cached, embedding = await semantic_cache.aget(idea)
+    if cached is not None:
+        response = _DESIGN_ADAPTER.validate_python({**cached, "idea": idea})
+        response_cache[key] = response.model_dump()
+        return response
+
+    state = await chain.ainvoke({"idea": idea})
+    response = _DESIGN_ADAPTER.validate_python(state)
+    response_cache[key] = response.model_dump()
+    await semantic_cache.aset(idea, response_cache[key], embedding)
+    return response
+
+@app.post("/design/stream")
+async def design_api_stream(idea: str = Query(..., description="Describe your API idea")):
+    """Stream the design, improvement and documentation as server-sent events."""
+    nodes = {"generate_api_design": "draft_design", "manager_review": "final_doc"}
+    # The improvement is speculative, so it is sent whole once the review has failed
+    verdicts = {"review_and_improve_design": ("review", "improved_design")}
+    events = stream_chain(chain, {"idea": idea}, nodes, verdicts=verdicts)
+    return StreamingResponse(events, media_type="text/event-stream")
 
 
 #pip install streamlit langchain_groq langgraph python-dotenv
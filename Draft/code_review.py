@@ -1,141 +1,59 @@
-import os
-from dotenv import load_dotenv
+#pip install streamlit langchain_groq python-dotenv cachetools httpx[http2]
+#streamlit run code_review.py
+
+import re
+import asyncio
+import threading
 import streamlit as st
-import sys
 
-from langchain_groq import ChatGroq
-from langgraph.graph import StateGraph, START, END
-from typing_extensions import TypedDict
-from IPython.display import Image, display
+# Imported modules are not re-executed on Streamlit reruns, so the LLM clients built in
+# workflow.py are created once per server process.
+import workflow
+from workflow import clean_python_code
 
 
-# --------------------------
-# Load Environment Variables
-# --------------------------
-load_dotenv()
-os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
-
 st.title("My First Project")
 
-# --------------------------
-# LangGraph State Definition
-# --------------------------
-class State(TypedDict):
-    topic: str
-    code: str
-    improved_code: str
-    final_code: str
-
-
-# Initialize LLM
-model_name = "gemma2-9b-it"
-llm = ChatGroq(model=f"{model_name}")
-
 
 # --------------------------
 # Helper Function
 # --------------------------
-def colorize_python_code(code: str) -> str:
-    """Apply ANSI colors: code = green, comments/docstrings = cyan."""
-    GREEN = "\033[92m"
-    CYAN = "\033[96m"
-    RESET = "\033[0m"
-
-    colored_lines = []
-    in_docstring = False
-
-    for line in code.splitlines():
-        stripped = line.strip()
-        if (stripped.startswith('"""') or stripped.startswith("'''")):
-            if not in_docstring:
-                colored_lines.append(f"{CYAN}{line}{RESET}")
-                in_docstring = True
-            else:
-                colored_lines.append(f"{CYAN}{line}{RESET}")
-                in_docstring = False
-        elif in_docstring:
-            colored_lines.append(f"{CYAN}{line}{RESET}")
-        elif stripped.startswith("#"):
-            colored_lines.append(f"{CYAN}{line}{RESET}")
-        else:
-            colored_lines.append(f"{GREEN}{line}{RESET}")
-
-    return "\n".join(colored_lines)
-
-
-# --------------------------
-# Workflow Nodes
-# --------------------------
-def generate_code(state: State):
-    msg = llm.invoke(f"Generate a python code with proper indentation about {state['topic']}")
-    return {"code": msg.content}
+# ANSI colors: code = green, comments/docstrings = cyan
+GREEN = "\033[92m"
+CYAN = "\033[96m"
+RESET = "\033[0m"
 
+# Captures docstrings/triple-quoted blocks and comments in a single scan
+_COMMENT_RE = re.compile(r'("""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|#[^\n]*)')
 
-def peer_review(state: State):
-    review_prompt = f"""
-    You are a code reviewer. The user wrote the following Python code:
 
-    {state['code']}
-
-    Please do the following:
-    1. Verify if the code is syntactically correct and runs without errors.
-    2. Test it on edge cases and typical test cases.
-    3. Check if it handles invalid inputs gracefully (if applicable).
-    4. Finally, return only one word: "Pass" if the code is correct and robust, otherwise "Fail".
-    """
-    msg = llm.invoke(review_prompt)
-    review_result = msg.content.strip().lower()
-    return "Pass" if "pass" in review_result else "Fail"
-
-
-def improve_code(state: State):
-    prompt = f"""
-    Here is the current Python code:
-
-    {state['code']}
+@st.cache_data
+def colorize_python_code(code: str) -> str:
+    """Apply ANSI colors: code = green, comments/docstrings = cyan."""
+    # split() with one capture group alternates code segments and comment/docstring matches
+    return "".join(
+        f"{CYAN if i % 2 else GREEN}{part}{RESET}"
+        for i, part in enumerate(_COMMENT_RE.split(code))
+        if part
+    )
 
-    Improve this code by:
-    1. Checking if there are more efficient Data Structures and Algorithms that can be applied.
-    2. Improving time and space complexity if possible.
-    3. Keeping readability and maintainability in mind.
-    4. Returning only the improved Python code with proper indentation and docstrings.
-    """
-    msg = llm.invoke(prompt)
-    return {"improved_code": msg.content}
 
+@st.cache_resource
+def get_chain():
+    """Workflow chain shared by all reruns and sessions."""
+    return workflow.chain
 
-def manager_review(state: State):
-    prompt = f"""
-    You are acting as a senior engineering manager reviewing this Python code:
 
-    {state['improved_code']}
+@st.cache_resource
+def get_event_loop():
+    """Background event loop shared by all reruns.
 
-    Please do the following:
-    1. Verify correctness and robustness of the code.
-    2. Ensure it passes edge cases and potential failure scenarios.
-    3. Check whether it uses efficient Data Structures / Algorithms where relevant.
-    4. Ensure code readability and Pythonic style.
+    The Groq clients and the concurrency semaphore stay bound to this one loop, which a fresh
+    asyncio.run() per click would break.
     """
-    msg = llm.invoke(prompt)
-    final_code = msg.content.strip()
-    colored_code = colorize_python_code(final_code)
-    return {"final_code": colored_code}
-
-
-# --------------------------
-# Build Workflow
-# --------------------------
-workflow = StateGraph(State)
-workflow.add_node("generate_code", generate_code)
-workflow.add_node("improve_code", improve_code)
-workflow.add_node("manager_review", manager_review)
-
-workflow.add_edge(START, "generate_code")
-workflow.add_conditional_edges("generate_code", peer_review, {"Fail": "improve_code", "Pass": END})
-workflow.add_edge("improve_code", "manager_review")
-workflow.add_edge("manager_review", END)
-
-chain = workflow.compile()
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
 
 
 # --------------------------
@@ -149,12 +67,20 @@ topic = st.text_input("Enter your topic:", placeholder="e.g., Take input string
 if st.button("Generate Code"):
     if topic.strip():
         with st.spinner("Generating and reviewing code..."):
-            state = chain.invoke({"topic": topic})
-            raw_code = state["code"]
-            clean_code = raw_code.strip("`").replace("python", "").strip()
-
-        st.subheader("✅ Clean Extracted Python Code")
-        st.code(clean_code, language="python")
+            future = asyncio.run_coroutine_threadsafe(get_chain().ainvoke({"topic": topic}), get_event_loop())
+            state = future.result()
+            # Kept in session state so later reruns show the result without calling Groq again
+            st.session_state["clean_code"] = clean_python_code(state["code"])
+            # The manager-reviewed code is kept ANSI-colored for terminal output; it is colorized
+            # here on the script thread rather than inside the shared workflow
+            if state.get("final_code"):
+                st.session_state["final_code"] = colorize_python_code(state["final_code"])
+            else:
+                st.session_state.pop("final_code", None)
 
     else:
         st.warning("⚠️ Please enter a topic before generating code.")
+
+if "clean_code" in st.session_state:
+    st.subheader("✅ Clean Extracted Python Code")
+    st.code(st.session_state["clean_code"], language="python")
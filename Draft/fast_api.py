@@ -1,131 +1,60 @@
 
-#pip install fastapi uvicorn langchain_groq langgraph python-dotenv
-#uvicorn main:app --reload
+#pip install fastapi uvicorn[standard] orjson langchain_groq python-dotenv cachetools httpx[http2] sentence-transformers
+#uvicorn fast_api:app --reload
+# Production: multiple workers with uvloop and the C httptools parser. Caches, the micro-batcher
+# and GROQ_MAX_CONCURRENCY are per worker process.
+#uvicorn fast_api:app --workers 4 --loop uvloop --http httptools --log-level warning
 
 
 import os
-from dotenv import load_dotenv
-from fastapi import FastAPI, Query
-from pydantic import BaseModel
-
-from langchain_groq import ChatGroq
-from langgraph.graph import StateGraph, START, END
-from typing_extensions import TypedDict
-
-
-# --------------------------
-# Load Environment Variables
-# --------------------------
-load_dotenv()
-os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
-
-
-# --------------------------
-# LangGraph State Definition
-# --------------------------
-class State(TypedDict):
-    topic: str
-    code: str
-    improved_code: str
-    final_code: str
-
-
-# Initialize LLM
-model_name = "gemma2-9b-it"
-llm = ChatGroq(model=f"{model_name}")
-
-
-# --------------------------
-# Helper Function
-# --------------------------
-def clean_python_code(raw_code: str) -> str:
-    """Remove markdown formatting and keep only code"""
-    return raw_code.strip("`").replace("python", "").strip()
-
-
-# --------------------------
-# Workflow Nodes
-# --------------------------
-def generate_code(state: State):
-    msg = llm.invoke(f"Generate a python code with proper indentation about {state['topic']}")
-    return {"code": msg.content}
-
-
-def peer_review(state: State):
-    review_prompt = f"""
-    You are a code reviewer. The user wrote the following Python code:
-
-    {state['code']}
-
-    Please do the following:
-    1. Verify if the code is syntactically correct and runs without errors.
-    2. Test it on edge cases and typical test cases.
-    3. Check if it handles invalid inputs gracefully (if applicable).
-    4. Finally, return only one word: "Pass" if the code is correct and robust, otherwise "Fail".
-    """
-    msg = llm.invoke(review_prompt)
-    review_result = msg.content.strip().lower()
-    return "Pass" if "pass" in review_result else "Fail"
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from cachetools import TTLCache
 
-def improve_code(state: State):
-    prompt = f"""
-    Here is the current Python code:
-
-    {state['code']}
-
-    Improve this code by:
-    1. Checking if there are more efficient Data Structures and Algorithms that can be applied.
-    2. Improving time and space complexity if possible.
-    3. Keeping readability and maintainability in mind.
-    4. Returning only the improved Python code with proper indentation and docstrings.
-    """
-    msg = llm.invoke(prompt)
-    return {"improved_code": msg.content}
-
+from semantic_cache import SemanticCache
+from streaming import stream_chain
+from workflow import chain, clean_python_code, generate_batcher, http_async_client, http_client, model_name
 
-def manager_review(state: State):
-    prompt = f"""
-    You are acting as a senior engineering manager reviewing this Python code:
 
-    {state['improved_code']}
+# Cache of full responses keyed on "generate:{model_name}:{topic}". It stores plain str keys and
+# model_dump() dicts, so a MutableMapping over a shared backend (e.g. Redis, with JSON-encoded
+# values) can be swapped in later.
+response_cache = TTLCache(maxsize=100, ttl=3600)
 
-    Please do the following:
-    1. Verify correctness and robustness of the code.
-    2. Ensure it passes edge cases and potential failure scenarios.
-    3. Check whether it uses efficient Data Structures / Algorithms where relevant.
-    4. Ensure code readability and Pythonic style.
-    """
-    msg = llm.invoke(prompt)
-    final_code = msg.content.strip()
-    return {"final_code": final_code}
+# Persistent fallback for near-duplicate topics that miss the exact-match cache. Off unless
+# SEMANTIC_CACHE_GENERATE=1: similar wording can ask for different code ("sort ascending" vs
+# "sort descending"), so a near match is only safe where the topics are known to allow it.
+semantic_cache = SemanticCache.from_env(f"generate:{model_name}",
+                                        enabled=os.getenv("SEMANTIC_CACHE_GENERATE", "0") == "1")
 
 
 # --------------------------
-# Build Workflow
+# FastAPI App
 # --------------------------
-workflow = StateGraph(State)
-workflow.add_node("generate_code", generate_code)
-workflow.add_node("improve_code", improve_code)
-workflow.add_node("manager_review", manager_review)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model before serving so the first request does not wait for it
+    await semantic_cache.warm()
+    yield
+    await generate_batcher.aclose()
+    await http_async_client.aclose()
+    http_client.close()
+    semantic_cache.close()
 
-workflow.add_edge(START, "generate_code")
-workflow.add_conditional_edges("generate_code", peer_review, {"Fail": "improve_code", "Pass": END})
-workflow.add_edge("improve_code", "manager_review")
-workflow.add_edge("manager_review", END)
 
-chain = workflow.compile()
-
-
-# --------------------------
-# FastAPI App
-# --------------------------
 app = FastAPI(title="Python Code Generator & Reviewer API",
-              description="Generate, improve, and review Python code using Groq LLM + LangGraph",
-              version="1.0")
+              description="Generate, improve, and review Python code using Groq LLMs via LangChain",
+              version="1.0",
+              default_response_class=ORJSONResponse,
+              lifespan=lifespan)
 
 
 class CodeResponse(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     topic: str
     raw_code: str
     clean_code: str
@@ -133,20 +62,46 @@ class CodeResponse(BaseModel):
     final_code: str | None = None
 
 
+# Prebuilt adapter validates the plain dict directly in pydantic-core (Pydantic v2)
+_CR_ADAPTER = TypeAdapter(CodeResponse)
+
+
 @app.get("/generate", response_model=CodeResponse)
-def generate_code_api(topic: str = Query(..., description="Topic for Python code generation")):
+async def generate_code_api(topic: str = Query(..., description="Topic for Python code generation")):
     """Generate Python code for a given topic"""
-    state = chain.invoke({"topic": topic})
+    key = f"generate:{model_name}:{topic}"
+    if key in response_cache:
+        return _CR_ADAPTER.validate_python(response_cache[key])
+
+    cached, embedding = await semantic_cache.aget(topic)
+    if cached is not None:
+        response = _CR_ADAPTER.validate_python({**cached, "topic": topic})
+        response_cache[key] = response.model_dump()
+        return response
+
+    state = await chain.ainvoke({"topic": topic}, config={"configurable": {"micro_batch": True}})
 
     raw_code = state.get("code", "")
     clean_code = clean_python_code(raw_code)
     improved_code = state.get("improved_code", None)
     final_code = state.get("final_code", None)
 
-    return CodeResponse(
-        topic=topic,
-        raw_code=raw_code,
-        clean_code=clean_code,
-        improved_code=improved_code,
-        final_code=final_code
-    )
+    response = _CR_ADAPTER.validate_python({
+        "topic": topic,
+        "raw_code": raw_code,
+        "clean_code": clean_code,
+        "improved_code": improved_code,
+        "final_code": final_code,
+    })
+    response_cache[key] = response.model_dump()
+    await semantic_cache.aset(topic, response_cache[key], embedding)
+    return response
+
+
+@app.get("/generate/stream")
+async def generate_code_stream(topic: str = Query(..., description="Topic for Python code generation")):
+    """Stream the generated, improved and manager-reviewed code as server-sent events"""
+    nodes = {"generate_code": "code", "manager_review": "final_code"}
+    verdicts = {"review_and_improve": ("review", "improved_code")}
+    events = stream_chain(chain, {"topic": topic}, nodes, verdicts=verdicts)
+    return StreamingResponse(events, media_type="text/event-stream")
@@ -0,0 +1,184 @@
+#pip install sentence-transformers numpy
+
+import os
+import json
+import sqlite3
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Persistent on-disk cache that reuses responses for semantically similar inputs.
+
+    Inputs are embedded with a small sentence-transformers model and stored in SQLite next to
+    their JSON response. A lookup embeds the new input and returns the stored response of the
+    nearest previous input if its cosine similarity is at least ``threshold``, so near-duplicate
+    topics ("rest api for todo app" vs "REST API for a to-do list") skip the LLM chain.
+
+    Embeddings are normalised, so cosine similarity is a dot product against an in-memory
+    matrix of all rows; this stays fast for the few thousand entries a cache like this holds.
+    The model and the stored rows are loaded by ``warm()`` at app startup (or on first use).
+
+    The table keeps at most ``max_entries`` rows per namespace, evicting the oldest first; there
+    is no TTL, so entries stay until evicted. Each worker process loads the rows once and then
+    only adds its own writes, so it does not see rows written by other workers (or notice their
+    evictions) until it restarts.
+
+    ``backend="onnx"`` loads the fp32 ``onnx/model.onnx`` export; pass ``model_file`` (e.g.
+    ``"onnx/model_qint8_avx512.onnx"``) to run one of the model's int8-quantised exports instead.
+    Constructed with ``enabled=False``, the cache opens no database and every lookup misses.
+
+    The cache is best-effort: if sentence-transformers is missing or the model cannot be
+    loaded, it disables itself and every lookup misses; lookup or store errors are logged and
+    never fail the request.
+    """
+
+    def __init__(self, path: str, namespace: str = "",
+                 model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 threshold: float = 0.9, backend: str = "torch", model_file: str | None = None,
+                 max_entries: int = 5000, enabled: bool = True):
+        self.namespace = namespace
+        self.model_name = model_name
+        self.threshold = threshold
+        self.backend = backend
+        self.model_file = model_file
+        self.max_entries = max_entries
+        self._model = None
+        self._enabled = enabled
+        # _lock guards the SQLite writes and the in-memory rows; _load_lock the one-time load
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._matrix = None
+        self._responses = []
+        self._conn = None
+        if not enabled:
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_cache "
+            "(namespace TEXT, input TEXT, embedding BLOB, response TEXT)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls, namespace: str, enabled: bool = True):
+        """Build a cache configured by the SEMANTIC_CACHE_* environment variables.
+
+        SEMANTIC_CACHE_DB is the SQLite path, SEMANTIC_CACHE_THRESHOLD the minimum cosine
+        similarity, SEMANTIC_CACHE_BACKEND the sentence-transformers backend ("torch", "onnx"
+        or "openvino") and SEMANTIC_CACHE_MODEL_FILE an optional export to load, such as
+        "onnx/model_qint8_avx512.onnx" for the int8 ONNX model.
+        """
+        return cls(os.getenv("SEMANTIC_CACHE_DB", "semantic_cache.sqlite3"),
+                   namespace=namespace,
+                   threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+                   backend=os.getenv("SEMANTIC_CACHE_BACKEND", "torch"),
+                   model_file=os.getenv("SEMANTIC_CACHE_MODEL_FILE") or None,
+                   enabled=enabled)
+
+    def _load(self):
+        """Import the embedding model and load stored rows, once."""
+        if self._model is not None or not self._enabled:
+            return
+        with self._load_lock:
+            if self._model is not None or not self._enabled:
+                return
+            try:
+                import numpy as np
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                logger.warning("sentence-transformers is not installed; semantic cache disabled")
+                self._enabled = False
+                return
+            try:
+                # backend="onnx" needs sentence-transformers[onnx]; model_file selects the export
+                model_kwargs = {"file_name": self.model_file} if self.model_file else None
+                model = SentenceTransformer(self.model_name, backend=self.backend, model_kwargs=model_kwargs)
+                rows = self._conn.execute(
+                    "SELECT embedding, response FROM semantic_cache WHERE namespace = ? "
+                    "ORDER BY rowid DESC LIMIT ?", (self.namespace, self.max_entries)
+                ).fetchall()[::-1]
+            except Exception:
+                logger.exception("could not load the semantic cache; semantic cache disabled")
+                self._enabled = False
+                return
+            self._np = np
+            self._responses = [response for _, response in rows]
+            if rows:
+                self._matrix = np.stack([np.frombuffer(embedding, dtype=np.float32) for embedding, _ in rows])
+            self._model = model
+
+    def _encode(self, text: str):
+        return self._model.encode(text, normalize_embeddings=True).astype(self._np.float32)
+
+    def _get(self, text: str):
+        self._load()
+        if not self._enabled:
+            return None, None
+        # Encoding runs outside the lock so concurrent lookups do not queue behind each other
+        embedding = self._encode(text)
+        with self._lock:
+            matrix, responses = self._matrix, self._responses
+        if matrix is None:
+            return None, embedding
+        scores = matrix @ embedding
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None, embedding
+        return json.loads(responses[best]), embedding
+
+    def _set(self, text: str, response: dict, embedding=None):
+        self._load()
+        if not self._enabled:
+            return
+        if embedding is None:
+            embedding = self._encode(text)
+        payload = json.dumps(response)
+        with self._lock:
+            # Commits on success, rolls back if either statement fails
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO semantic_cache (namespace, input, embedding, response) VALUES (?, ?, ?, ?)",
+                    (self.namespace, text, embedding.tobytes(), payload),
+                )
+                self._conn.execute(
+                    "DELETE FROM semantic_cache WHERE namespace = ? AND rowid NOT IN "
+                    "(SELECT rowid FROM semantic_cache WHERE namespace = ? ORDER BY rowid DESC LIMIT ?)",
+                    (self.namespace, self.namespace, self.max_entries),
+                )
+            # New matrix and list objects, so a lookup holding the previous pair stays consistent
+            row = embedding[None, :]
+            matrix = row if self._matrix is None else self._np.vstack([self._matrix, row])
+            self._matrix = matrix[-self.max_entries:]
+            self._responses = [*self._responses, payload][-self.max_entries:]
+
+    async def warm(self):
+        """Load the embedding model and stored rows ahead of the first lookup."""
+        await asyncio.to_thread(self._load)
+
+    async def aget(self, text: str):
+        """Return ``(response, embedding)`` for the most similar stored input.
+
+        ``response`` is None on a miss; pass ``embedding`` to ``aset`` so the input is not
+        encoded twice.
+        """
+        # Embedding and SQLite I/O are blocking, so keep them off the event loop
+        try:
+            return await asyncio.to_thread(self._get, text)
+        except Exception:
+            logger.exception("semantic cache lookup failed")
+            return None, None
+
+    async def aset(self, text: str, response: dict, embedding=None):
+        """Store ``response`` for ``text``; failures are logged and otherwise ignored."""
+        try:
+            await asyncio.to_thread(self._set, text, response, embedding)
+        except Exception:
+            logger.exception("semantic cache store failed")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
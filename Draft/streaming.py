@@ -0,0 +1,83 @@
+# streaming.py
+# Server-sent event helpers shared by the FastAPI apps (fast_api.py and Full_Code.py).
+
+import time
+
+
+# Tokens are buffered and flushed every 8KB or 25ms to cut per-chunk overhead
+STREAM_FLUSH_BYTES = 8192
+STREAM_FLUSH_SECONDS = 0.025
+
+
+def sse_event(event: str, data: str) -> str:
+    """Format one server-sent event, prefixing every line of data"""
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {event}\n{lines}\n"
+
+
+def _event_node(event: dict, nodes: dict[str, str]):
+    """Return the workflow node an LLM event belongs to, by step tag or LangGraph node."""
+    for tag in event.get("tags", []):
+        if tag in nodes:
+            return tag
+    node = event["metadata"].get("langgraph_node")
+    return node if node in nodes else None
+
+
+async def stream_chain(chain, inputs: dict, nodes: dict[str, str],
+                       verdicts: dict[str, tuple[str, ...]] | None = None):
+    """Yield buffered SSE events carrying the LLM tokens emitted by the given workflow nodes.
+
+    ``nodes`` maps each node to the state field it writes; nodes served from the memo cache emit
+    no tokens, so their cached output is sent once the chain finishes. ``verdicts`` maps a step
+    name to the output fields sent as their own events (named after the field) as soon as that
+    step finishes; fields the step did not produce are skipped. Calls tagged ``review_gate`` are
+    never streamed.
+    """
+    verdicts = verdicts or {}
+    buffer, buffer_node, size = [], None, 0
+    streamed = set()
+    last_flush = time.monotonic()
+    async for event in chain.astream_events(inputs, version="v2"):
+        if event["event"] == "on_chain_end" and not event["parent_ids"]:
+            if buffer:
+                yield sse_event(buffer_node, "".join(buffer))
+                buffer = []
+            for node, field in nodes.items():
+                if node not in streamed and event["data"]["output"].get(field):
+                    yield sse_event(node, event["data"]["output"][field])
+            continue
+        if event["event"] == "on_chain_end" and event["name"] in verdicts:
+            if buffer:
+                yield sse_event(buffer_node, "".join(buffer))
+                buffer, size, last_flush = [], 0, time.monotonic()
+            for field in verdicts[event["name"]]:
+                if event["data"]["output"].get(field):
+                    yield sse_event(field, event["data"]["output"][field])
+            continue
+        if event["event"] == "on_chat_model_end":
+            # Flush the tail of a finished LLM call now instead of holding it until the next
+            # token, which may only arrive after the following LLM round trip
+            if buffer:
+                yield sse_event(buffer_node, "".join(buffer))
+                buffer, size, last_flush = [], 0, time.monotonic()
+            continue
+        if event["event"] != "on_chat_model_stream" or "review_gate" in event.get("tags", []):
+            continue
+        node = _event_node(event, nodes)
+        if node is None:
+            continue
+        if buffer and node != buffer_node:
+            yield sse_event(buffer_node, "".join(buffer))
+            buffer, size, last_flush = [], 0, time.monotonic()
+        buffer_node = node
+        streamed.add(node)
+        text = event["data"]["chunk"].content
+        buffer.append(text)
+        size += len(text)
+        if size >= STREAM_FLUSH_BYTES or time.monotonic() - last_flush >= STREAM_FLUSH_SECONDS:
+            yield sse_event(node, "".join(buffer))
+            buffer, size, last_flush = [], 0, time.monotonic()
+    if buffer:
+        yield sse_event(buffer_node, "".join(buffer))
+    yield sse_event("end", "")
@@ -0,0 +1,342 @@
+# workflow.py
+# Shared Groq + LangChain code generation workflow used by the FastAPI (fast_api.py) and
+# Streamlit (code_review.py) apps. Full_Code.py reuses its LLM clients and helpers.
+#pip install langchain_groq python-dotenv cachetools httpx[http2]
+
+
+import os
+import re
+import asyncio
+import contextvars
+import hashlib
+import functools
+
+import httpx
+from dotenv import load_dotenv
+from cachetools import LRUCache
+
+from langchain_groq import ChatGroq
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from typing_extensions import TypedDict
+
+
+# --------------------------
+# Load Environment Variables
+# --------------------------
+load_dotenv()
+os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
+
+
+# --------------------------
+# Workflow State Definition
+# --------------------------
+class State(TypedDict):
+    topic: str
+    code: str
+    review: str
+    improved_code: str
+    final_code: str
+
+
+# Shared HTTP clients so every Groq call reuses pooled keep-alive HTTP/2 connections
+http_limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+http_client = httpx.Client(http2=True, limits=http_limits, timeout=60)
+http_async_client = httpx.AsyncClient(http2=True, limits=http_limits, timeout=60)
+
+# Initialize LLM
+model_name = "gemma2-9b-it"
+llm = ChatGroq(model=f"{model_name}", http_client=http_client, http_async_client=http_async_client)
+
+# Small, fast model used only for the one-word Pass/Fail review gate
+fast_model_name = os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant")
+
+
+def get_fast_llm():
+    """Return the gating LLM, falling back to the main model if the fast one is unavailable."""
+    if not fast_model_name:
+        return llm.with_config(tags=["review_gate"])
+    fast_llm = ChatGroq(model=fast_model_name, http_client=http_client, http_async_client=http_async_client)
+    return fast_llm.with_fallbacks([llm]).with_config(tags=["review_gate"])
+
+
+llm_fast = get_fast_llm()
+
+# Bounds concurrent Groq calls across all in-flight requests to stay under the rate limit
+llm_semaphore = asyncio.Semaphore(int(os.getenv("GROQ_MAX_CONCURRENCY", "16")))
+
+
+# --------------------------
+# Helper Function
+# --------------------------
+# Captures the body of the first ``` / ```python / ```py fenced block, up to its closing fence
+# (or the end of the text if the block is unterminated)
+_FENCE_RE = re.compile(r"```[ \t]*(?:python|py)?[ \t]*\n(.*?)(?:```|\Z)", re.DOTALL | re.IGNORECASE)
+
+
+def clean_python_code(raw_code: str) -> str:
+    """Remove markdown formatting and keep only code"""
+    match = _FENCE_RE.search(raw_code)
+    return (match.group(1) if match else raw_code).strip()
+
+
+async def bounded_ainvoke(model, prompt, node: str | None = None, config: RunnableConfig | None = None):
+    """Call the model while holding a slot of the shared Groq concurrency limit.
+
+    ``node`` tags the call with the workflow step so streamed tokens can be attributed to it.
+    ``config`` is the caller's run config, for calls made outside the caller's own context.
+    """
+    if node:
+        config = {**(config or {}), "tags": [*(config or {}).get("tags", []), node]}
+    async with llm_semaphore:
+        return await model.ainvoke(prompt, config=config)
+
+
+def memoize_node(field: str, maxsize: int = 128):
+    """Cache an async node's output on a sha256 of ``state[field]``.
+
+    Re-reviewing or re-improving an identical input then skips the LLM call entirely.
+    """
+    def decorator(node):
+        cache = LRUCache(maxsize=maxsize)
+
+        @functools.wraps(node)
+        async def wrapper(state: dict):
+            key = hashlib.sha256(state[field].encode()).hexdigest()
+            if key not in cache:
+                cache[key] = await node(state)
+            return cache[key]
+
+        return wrapper
+
+    return decorator
+
+
+# --------------------------
+# Micro-Batching
+# --------------------------
+class MicroBatcher:
+    """Collect prompts arriving within a short window and send them to the LLM together.
+
+    Groq has no multi-prompt endpoint, so a batch is sent as overlapping individual requests
+    (each its own task under the shared concurrency limit); callers simply
+    ``await batcher.ainvoke(prompt)``, and cancelling that await cancels the request.
+
+    The worker runs in an empty context so it does not inherit the run config of whichever
+    request happened to start it; each prompt is sent with its own caller's config instead.
+    """
+
+    def __init__(self, model, max_batch_size: int = 16, max_wait: float = 0.02):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+        self._inflight = set()
+
+    async def ainvoke(self, prompt, config: RunnableConfig | None = None, node: str | None = None):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._collect(), context=contextvars.Context())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, config, node, future))
+        return await future
+
+    async def aclose(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for task in list(self._inflight):
+            task.cancel()
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        # Each prompt runs as its own task so a caller that goes away (e.g. a client
+        # disconnect) cancels just its Groq request and frees its concurrency slot
+        for prompt, config, node, future in batch:
+            if future.done():
+                continue
+            task = asyncio.create_task(bounded_ainvoke(self.model, prompt, node, config))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            task.add_done_callback(functools.partial(self._resolve, future))
+            future.add_done_callback(functools.partial(self._cancel_if_abandoned, task))
+
+    @staticmethod
+    def _resolve(future, task):
+        if future.done():
+            return
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    @staticmethod
+    def _cancel_if_abandoned(task, future):
+        if future.cancelled():
+            task.cancel()
+
+
+generate_batcher = MicroBatcher(llm)
+
+
+# --------------------------
+# Prompt Templates
+# --------------------------
+# The static instructions go first as the system message and the generated code is appended
+# last as the human message, so every call shares a byte-identical prefix that the provider
+# can serve from its prompt cache.
+GENERATE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Generate a python code with proper indentation about the topic given by the user."),
+    ("human", "{topic}"),
+])
+
+REVIEW_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """
+You are a code reviewer. The user will send the Python code they wrote.
+
+Please do the following:
+1. Verify if the code is syntactically correct and runs without errors.
+2. Test it on edge cases and typical test cases.
+3. Check if it handles invalid inputs gracefully (if applicable).
+4. Finally, return only one word: "Pass" if the code is correct and robust, otherwise "Fail".
+"""),
+    ("human", "{code}"),
+])
+
+IMPROVE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """
+The user will send the current Python code.
+
+Improve this code by:
+1. Checking if there are more efficient Data Structures and Algorithms that can be applied.
+2. Improving time and space complexity if possible.
+3. Keeping readability and maintainability in mind.
+4. Returning only the improved Python code with proper indentation and docstrings.
+"""),
+    ("human", "{code}"),
+])
+
+MANAGER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """
+You are acting as a senior engineering manager reviewing the Python code sent by the user.
+
+Please do the following:
+1. Verify correctness and robustness of the code.
+2. Ensure it passes edge cases and potential failure scenarios.
+3. Check whether it uses efficient Data Structures / Algorithms where relevant.
+4. Ensure code readability and Pythonic style.
+"""),
+    ("human", "{code}"),
+])
+
+
+# --------------------------
+# Workflow Nodes
+# --------------------------
+async def generate_code(state: State, config: RunnableConfig):
+    prompt = GENERATE_PROMPT.format_messages(topic=state["topic"])
+    # Streaming requests skip the batching window so their first token is not delayed
+    if config.get("configurable", {}).get("micro_batch"):
+        msg = await generate_batcher.ainvoke(prompt, config, "generate_code")
+    else:
+        msg = await bounded_ainvoke(llm, prompt, "generate_code")
+    return {"code": msg.content}
+
+
+@memoize_node("code")
+async def peer_review(state: State):
+    msg = await bounded_ainvoke(llm_fast, REVIEW_PROMPT.format_messages(code=state["code"]), "peer_review")
+    review_result = msg.content.strip().lower()
+    return "Pass" if "pass" in review_result else "Fail"
+
+
+@memoize_node("code")
+async def improve_code(state: State):
+    msg = await bounded_ainvoke(llm, IMPROVE_PROMPT.format_messages(code=state["code"]), "improve_code")
+    return {"improved_code": msg.content}
+
+
+@memoize_node("improved_code")
+async def manager_review(state: State):
+    msg = await bounded_ainvoke(llm, MANAGER_PROMPT.format_messages(code=state["improved_code"]), "manager_review")
+    final_code = msg.content.strip()
+    return {"final_code": final_code}
+
+
+async def speculative_review(review, improve, state: dict):
+    """Run ``review`` and a speculative ``improve`` of the same state concurrently.
+
+    Returns the verdict and the improvement's output, or None when the review passes. The
+    improvement is discarded (and its Groq request cancelled) if the review passes, and an
+    error from it only fails the request when the review fails. The TaskGroup (Python 3.11+)
+    cancels the improvement if the review itself fails, so no Groq request is left orphaned.
+    """
+    async def speculative_improve():
+        try:
+            return await improve(state)
+        except Exception as exc:
+            return exc
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            review_task = tg.create_task(review(state))
+            improve_task = tg.create_task(speculative_improve())
+            verdict = await review_task
+            if verdict == "Pass":
+                improve_task.cancel()
+    except ExceptionGroup as group:
+        # Only the review can fail the group; surface its original error
+        raise group.exceptions[0]
+    if verdict == "Pass":
+        return verdict, None
+    improved = improve_task.result()
+    if isinstance(improved, Exception):
+        raise improved
+    return verdict, improved
+
+
+async def review_and_improve(state: State):
+    """Peer review the generated code while speculatively improving it."""
+    review, improved = await speculative_review(peer_review, improve_code, state)
+    return {"review": review, **(improved or {})}
+
+
+# Wrapped as a runnable so streaming clients get an event when the review verdict is known
+review_and_improve_step = RunnableLambda(review_and_improve)
+
+
+# --------------------------
+# Workflow Pipeline
+# --------------------------
+async def run_pipeline(inputs: dict, config: RunnableConfig):
+    """Run generate -> review -> (improve -> manager_review) as plain awaits.
+
+    The workflow is a short linear chain, so it is sequenced directly instead of through a
+    compiled LangGraph graph, avoiding per-node state copying and edge dispatch.
+    """
+    state: State = {"topic": inputs["topic"]}
+    state.update(await generate_code(state, config))
+    state.update(await review_and_improve_step.ainvoke(state))
+    if state["review"] == "Fail":
+        state.update(await manager_review(state))
+    return state
+
+
+chain = RunnableLambda(run_pipeline, name="code_pipeline")